@@ -1,11 +1,11 @@
+import functools
 import logging
 import os
-import subprocess
 import sys
-import threading
 
 import pystray
 from PIL import Image, ImageDraw
+from watchdog.events import FileCreatedEvent, FileMovedEvent
 from watchdog.observers import Observer
 
 from service.file_upload_handler import FileUploadHandler
@@ -13,44 +13,57 @@ from utils.config_manager import get_src_dir
 
 logger = logging.getLogger(__name__)
 
+# 監視スレッドの終了を待つ最大時間（秒）
+OBSERVER_JOIN_TIMEOUT = 1.0
+
+
+@functools.cache
+def _build_icon_image() -> Image.Image:
+    """タスクトレイ用アイコン画像を作成（内容は固定のため初回のみ描画）"""
+    size = 64
+    image = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+
+    draw.ellipse([4, 4, size - 4, size - 4], fill='#4A90D9')
+
+    # ファイルアイコン風の図形
+    draw.rectangle([20, 12, 44, 52], fill='white')
+    # 折り返し部分
+    draw.polygon([(32, 12), (44, 24), (32, 24)], fill='#4A90D9')
+
+    # 矢印
+    draw.line([(24, 38), (40, 38)], fill='#4A90D9', width=3)
+    draw.polygon([(36, 33), (42, 38), (36, 43)], fill='#4A90D9')
+
+    return image
+
 
 class TrayApp:
     """タスクトレイアプリケーション"""
 
     def __init__(self):
         self.src_dir = get_src_dir()
+        # 末尾の区切り文字で空文字にならないよう正規化してからフォルダ名を取り出す
+        self.src_dir_name = os.path.basename(os.path.normpath(self.src_dir))
         self.observer = None
+        self.event_handler: FileUploadHandler | None = None
         self.icon = None
         self._validate_src_dir()
 
     def _validate_src_dir(self):
         """監視フォルダの存在確認"""
-        if not os.path.exists(self.src_dir):
-            logger.error(f"監視フォルダが存在しません: {self.src_dir}")
+        if not os.path.isdir(self.src_dir):
+            logger.error("監視フォルダが存在しません: %s", self.src_dir)
             sys.exit(1)
 
     def _create_icon_image(self) -> Image.Image:
-        """タスクトレイ用アイコン画像を作成"""
-        size = 64
-        image = Image.new('RGBA', (size, size), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(image)
-
-        draw.ellipse([4, 4, size - 4, size - 4], fill='#4A90D9')
-
-        # ファイルアイコン風の図形
-        draw.rectangle([20, 12, 44, 52], fill='white')
-        # 折り返し部分
-        draw.polygon([(32, 12), (44, 24), (32, 24)], fill='#4A90D9')
-
-        # 矢印
-        draw.line([(24, 38), (40, 38)], fill='#4A90D9', width=3)
-        draw.polygon([(36, 33), (42, 38), (36, 43)], fill='#4A90D9')
-
-        return image
+        """タスクトレイ用アイコン画像を取得"""
+        return _build_icon_image()
 
     def _open_folder(self):
         """監視フォルダをエクスプローラーで開く"""
-        subprocess.Popen(['explorer', self.src_dir])
+        # explorer.exeを新たに起動せず、ShellExecute経由で既存のエクスプローラーに開かせる
+        os.startfile(self.src_dir)
 
     def _quit_app(self):
         """アプリケーションを終了"""
@@ -63,7 +76,7 @@ class TrayApp:
         """タスクトレイメニューを作成"""
         return pystray.Menu(
             pystray.MenuItem(
-                text=f"監視中: {os.path.basename(self.src_dir)}",
+                text=f"監視中: {self.src_dir_name}",
                 action=None,
                 enabled=False
             ),
@@ -81,28 +94,52 @@ class TrayApp:
 
     def start_watching(self):
         """ファイル監視を開始"""
-        event_handler = FileUploadHandler()
+        # 動作中のObserverがあればスレッドを作り直さず、監視の登録だけを差し替える
+        observer = self.observer
+        reuse_observer = observer is not None and observer.is_alive()
+        if observer is None or not reuse_observer:
+            observer = Observer()
+            self.observer = observer
+        else:
+            # 前のハンドラーにイベントが届かないよう、閉じる前に登録を外す
+            observer.unschedule_all()
+
+        # 再開時は前のハンドラーのブラウザとタイマーを残さないよう閉じる
+        if self.event_handler:
+            self.event_handler.close()
+        self.event_handler = FileUploadHandler()
+        # ブラウザの起動と既存ファイルのスキャンを並行させる
+        self.event_handler.uploader.warm_up()
 
         # 起動時に既存ファイルをスキャンして処理
-        event_handler.scan_existing_files(self.src_dir)
-
-        self.observer = Observer()
-        self.observer.schedule(event_handler, self.src_dir, recursive=False)
-        self.observer.start()
-        logger.info(f"フォルダ監視を開始しました: {self.src_dir}")
+        self.event_handler.scan_existing_files(self.src_dir)
+
+        # 作成・移動以外のイベントはキューに積まずエミッター側で破棄する
+        observer.schedule(
+            self.event_handler,
+            self.src_dir,
+            recursive=False,
+            event_filter=[FileCreatedEvent, FileMovedEvent]
+        )
+        if not reuse_observer:
+            observer.start()
+        logger.info("フォルダ監視を開始しました: %s", self.src_dir)
 
     def stop_watching(self):
         """ファイル監視を停止"""
         if self.observer:
             self.observer.stop()
-            self.observer.join()
+            self.observer.join(timeout=OBSERVER_JOIN_TIMEOUT)
+            if self.observer.is_alive():
+                logger.warning("フォルダ監視スレッドの終了を待たずに停止します")
             logger.info("フォルダ監視を停止しました")
+        if self.event_handler:
+            self.event_handler.close()
 
     def run(self):
         """アプリケーションを実行"""
-        # ファイル監視を別スレッドで開始
-        watch_thread = threading.Thread(target=self.start_watching, daemon=True)
-        watch_thread.start()
+        # Observerとブラウザの起動は各自のスレッドで行われるため、監視の開始処理はその場で呼ぶ
+        self.start_watching()
 
         # タスクトレイアイコンを設定
         self.icon = pystray.Icon(
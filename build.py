@@ -1,3 +1,4 @@
+import importlib.util
 import os
 import subprocess
 import sys
@@ -6,13 +7,23 @@ from pathlib import Path
 from scripts.version_manager import update_version
 
 
+BROWSER_DIR_PREFIXES = ('chromium-', 'chromium_headless_shell-')
+
+
 def get_playwright_browsers_path():
-    default_path = Path.home() / 'AppData' / 'Local' / 'ms-playwright'
-    if default_path.exists():
-        return str(default_path)
+    return str(Path.home() / 'AppData' / 'Local' / 'ms-playwright')
 
-    print("[ERROR] Playwrightブラウザが見つかりません")
-    return None
+
+def find_browser_dirs(playwright_browsers_path):
+    # 存在確認とディレクトリ判定をscandirの1回の走査で済ませる
+    try:
+        with os.scandir(playwright_browsers_path) as entries:
+            return [entry.name for entry in entries
+                    if entry.is_dir(follow_symlinks=False)
+                    and entry.name.startswith(BROWSER_DIR_PREFIXES)]
+    except FileNotFoundError:
+        print("[ERROR] Playwrightブラウザが見つかりません")
+        return None
 
 
 def build_executable():
@@ -30,11 +41,10 @@ def build_executable():
         "--collect-all", "playwright",
     ]
 
-    if playwright_browsers_path and os.path.exists(playwright_browsers_path):
-        print(f"[OK] Playwrightブラウザを含めます: {playwright_browsers_path}")
+    browser_dirs = find_browser_dirs(playwright_browsers_path)
 
-        browser_dirs = [d for d in os.listdir(playwright_browsers_path)
-                       if d.startswith('chromium-') or d.startswith('chromium_headless_shell-')]
+    if browser_dirs is not None:
+        print(f"[OK] Playwrightブラウザを含めます: {playwright_browsers_path}")
 
         if browser_dirs:
             for browser_dir_name in browser_dirs:
@@ -60,16 +70,11 @@ def build_executable():
 
 if __name__ == "__main__":
 
-    try:
-        subprocess.run(
-            [sys.executable, "-c", "from playwright.sync_api import sync_playwright"],
-            check=True,
-            capture_output=True
-        )
-        print("[OK] Playwrightがインストールされています")
-    except subprocess.CalledProcessError:
+    # インタプリタを別プロセスで起動せずにインストール有無を確認
+    if importlib.util.find_spec("playwright") is None:
         print("[ERROR] エラー: Playwrightがインストールされていません。")
         sys.exit(1)
+    print("[OK] Playwrightがインストールされています")
 
     result = build_executable()
     if result is None:
@@ -14,10 +14,10 @@ def main():
         app = TrayApp()
         app.run()
     except FileNotFoundError as e:
-        logger.error(f"設定ファイルエラー: {e}")
+        logger.error("設定ファイルエラー: %s", e)
         sys.exit(1)
     except Exception as e:
-        logger.error(f"予期せぬエラーが発生しました: {e}")
+        logger.error("予期せぬエラーが発生しました: %s", e)
         sys.exit(1)
 
 
@@ -1,6 +1,8 @@
 import logging
+import os
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from watchdog.events import FileSystemEventHandler
@@ -10,6 +12,36 @@ from utils.config_manager import get_batch_delay, get_mega_url, get_rename_patte
 
 logger = logging.getLogger(__name__)
 
+MAX_DELETE_WORKERS = 8
+# ファイルサイズの変化を確認する間隔（秒）
+STABILITY_CHECK_INTERVAL = 0.1
+
+
+def _unlink_file(file_path: Path) -> Exception | None:
+    """ファイルを削除し、失敗した場合は例外を返す"""
+    try:
+        file_path.unlink()
+        return None
+    except Exception as e:
+        return e
+
+
+def _file_stem(name: str) -> str:
+    """Path.stemと同じ規則で、ファイル名から最後の拡張子を除いた部分を返す"""
+    # 監視イベントと既存ファイルのスキャンで同じファイル名の判定が食い違わないよう両方で使う
+    dot = name.rfind('.')
+    if 0 < dot < len(name) - 1:
+        return name[:dot]
+    return name
+
+
+def _get_size(path: Path) -> int | None:
+    """ファイルサイズを返し、ファイルが存在しない場合はNoneを返す"""
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return None
+
 
 class FileUploadHandler(FileSystemEventHandler):
     """ファイルをMEGAにアップロードするハンドラー"""
@@ -17,6 +49,8 @@ class FileUploadHandler(FileSystemEventHandler):
     def __init__(self):
         super().__init__()
         self.pattern = get_rename_pattern()
+        # イベントごとの属性参照を避けるため検索メソッドを束縛しておく
+        self._pattern_search = self.pattern.search
         self.wait_time = get_wait_time()
         self.batch_delay = get_batch_delay()
 
@@ -24,8 +58,8 @@ class FileUploadHandler(FileSystemEventHandler):
         mega_url = get_mega_url()
         self.uploader = MegaUploader(mega_url)
 
-        # 複数ファイル処理用のキュー
-        self._pending_files: list[Path] = []
+        # 複数ファイル処理用のキュー（挿入順を保ちつつ重複判定をO(1)で行うためdictを使う）
+        self._pending_files: dict[Path, None] = {}
         self._lock = threading.Lock()
         self._timer: threading.Timer | None = None
 
@@ -43,27 +77,30 @@ class FileUploadHandler(FileSystemEventHandler):
 
     def _add_to_queue(self, file_path: str):
         """ファイルをキューに追加しバッチ処理タイマーをリセット"""
-        # ファイル書き込み完了を待つ
-        time.sleep(self.wait_time)
-
+        # 書き込み完了の確認はタイマースレッドで行い、監視スレッドを待たせない
         path = Path(file_path)
         if not path.exists():
             return
         # 拡張子を除いたファイル名
-        filename = path.stem
+        filename = _file_stem(path.name)
 
         if self.should_process(filename):
-            logger.info(f"対象ファイルが見つかりました: {filename}")
+            logger.info("対象ファイルが見つかりました: %s", filename)
 
+            # ロック内はキューへの追加とタイマーの差し替えだけにとどめ、ログ出力は外で行う
             with self._lock:
                 # 既にキューにある場合は追加しない
-                if path not in self._pending_files:
-                    self._pending_files.append(path)
-                    logger.info(f"現在{len(self._pending_files)}件のファイルが待機中")
+                added = path not in self._pending_files
+                if added:
+                    self._pending_files[path] = None
+                pending_count = len(self._pending_files)
 
                 # タイマーをリセット（新しいファイルが来たら処理開始を遅延）
                 self._reset_timer()
 
+            if added:
+                logger.info("現在%s件のファイルが待機中", pending_count)
+
     def _reset_timer(self):
         """バッチ処理タイマーをリセット"""
         if self._timer:
@@ -78,10 +115,15 @@ class FileUploadHandler(FileSystemEventHandler):
             if not self._pending_files:
                 return
 
-            files_to_process = self._pending_files.copy()
+            pending_files = list(self._pending_files)
             self._pending_files.clear()
 
-        logger.info(f"バッチ処理開始: {len(files_to_process)}件のファイルを処理します")
+        # 書き込み中に削除されたファイルは処理対象から外す
+        files_to_process = self._wait_until_stable(pending_files)
+        if not files_to_process:
+            return
+
+        logger.info("バッチ処理開始: %s件のファイルを処理します", len(files_to_process))
 
         # 複数ファイルを一括アップロード
         uploaded_files = self.uploader.upload_files(files_to_process)
@@ -93,25 +135,45 @@ class FileUploadHandler(FileSystemEventHandler):
         # 処理結果のサマリーを表示
         failed_count = len(files_to_process) - len(uploaded_files)
         if failed_count > 0:
-            logger.warning(f"{failed_count}件のファイルがアップロードに失敗しました")
+            logger.warning("%s件のファイルがアップロードに失敗しました", failed_count)
+
+    def _wait_until_stable(self, paths: list[Path]) -> list[Path]:
+        """全ファイルのサイズが変化しなくなるまでまとめて最大wait_time秒待機し、消えていないファイルを返す"""
+        deadline = time.monotonic() + self.wait_time
+        last_sizes = {path: _get_size(path) for path in paths}
+        # 待機は全ファイルで共有し、1回の間隔ごとに未確定のファイルだけをstatする
+        unsettled = [path for path in paths if last_sizes[path] is not None]
+        while unsettled and time.monotonic() < deadline:
+            time.sleep(STABILITY_CHECK_INTERVAL)
+            still_changing = []
+            for path in unsettled:
+                current_size = _get_size(path)
+                if current_size is not None and (current_size != last_sizes[path] or current_size == 0):
+                    still_changing.append(path)
+                last_sizes[path] = current_size
+            unsettled = still_changing
+        return [path for path in paths if last_sizes[path] is not None]
 
     def _delete_uploaded_files(self, files: list[Path]):
         """アップロード完了したファイルを削除"""
-        logger.info(f"{len(files)}件のファイルを削除します")
-
-        for file_path in files:
-            try:
-                if file_path.exists():
-                    file_path.unlink()
-                    logger.info(f"削除完了: {file_path.name}")
-            except Exception as e:
-                logger.error(f"削除失敗: {file_path.name}: {e}")
+        logger.info("%s件のファイルを削除します", len(files))
+
+        # ネットワークドライブ上でも待ち時間が重なるよう並行して削除する
+        max_workers = min(MAX_DELETE_WORKERS, len(files)) or 1
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for file_path, error in zip(files, executor.map(_unlink_file, files)):
+                if error is None:
+                    logger.info("削除完了: %s", file_path.name)
+                elif isinstance(error, FileNotFoundError):
+                    logger.debug("既に存在しないため削除をスキップ: %s", file_path.name)
+                else:
+                    logger.error("削除失敗: %s: %s", file_path.name, error)
 
         logger.info("すべてのファイルの削除処理が完了しました")
 
     def should_process(self, filename: str) -> bool:
         """ファイル名が処理対象かどうかを判定"""
-        return bool(self.pattern.search(filename))
+        return self._pattern_search(filename) is not None
 
     def get_pending_count(self) -> int:
         """待機中のファイル数を取得"""
@@ -124,23 +186,41 @@ class FileUploadHandler(FileSystemEventHandler):
             self._timer.cancel()
         self._process_pending_files()
 
+    def close(self):
+        """待機中のタイマーを止めアップローダーを終了する"""
+        if self._timer:
+            self._timer.cancel()
+        self.uploader.close()
+
     def scan_existing_files(self, directory: str):
         """指定ディレクトリ内の既存ファイルをスキャンしてキューに追加"""
-        dir_path = Path(directory)
-        if not dir_path.exists():
+        try:
+            matched_files = self._find_matching_files(directory)
+        except FileNotFoundError:
             return
 
-        found_count = 0
-        for file_path in dir_path.iterdir():
-            if file_path.is_file() and self.should_process(file_path.stem):
-                logger.info(f"既存の対象ファイルが見つかりました: {file_path.name}")
-                with self._lock:
-                    if file_path not in self._pending_files:
-                        self._pending_files.append(file_path)
-                        found_count += 1
+        with self._lock:
+            # 既にキューにあるファイルは位置を変えずに残るため、増えた件数が新規追加分になる
+            pending_count = len(self._pending_files)
+            self._pending_files.update(dict.fromkeys(matched_files))
+            found_count = len(self._pending_files) - pending_count
 
         if found_count > 0:
-            logger.info(f"{found_count}件の既存ファイルをキューに追加しました")
+            logger.info("%s件の既存ファイルをキューに追加しました", found_count)
             self._reset_timer()
         else:
             logger.info("処理対象の既存ファイルはありませんでした")
+
+    def _find_matching_files(self, directory: str) -> list[Path]:
+        """ディレクトリ直下からパターンにマッチするファイルを列挙"""
+        matched_files: list[Path] = []
+        # DirEntryは走査時に取得した種別を保持するため、通常ファイルなら追加のstatが発生しない
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                if self.should_process(_file_stem(entry.name)):
+                    logger.info("既存の対象ファイルが見つかりました: %s", entry.name)
+                    # パターンにマッチしたものだけPathを生成する
+                    matched_files.append(Path(entry.path))
+        return matched_files
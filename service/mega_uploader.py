@@ -1,21 +1,47 @@
 import logging
+import re
 import time
-from collections.abc import Generator
-from contextlib import contextmanager
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from playwright.sync_api import Page, sync_playwright
+from playwright.sync_api import Browser, Locator, Page, Playwright, expect, sync_playwright
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 
 from utils.config_manager import (
-    get_check_interval,
     get_headless,
     get_max_wait_time,
+    get_parallel_uploads,
     get_post_upload_wait,
     get_upload_complete_text,
 )
 
 logger = logging.getLogger(__name__)
 
+# アップロードに不要な描画処理を省いてChromiumの起動と読み込みを軽くする
+CHROMIUM_ARGS = [
+    "--disable-gpu",
+    "--disable-dev-shm-usage",
+    "--disable-extensions",
+    "--disable-accelerated-2d-canvas",
+    "--disable-webgl",
+    "--disable-mipmap-generation",
+    "--disable-partial-raster",
+    "--blink-settings=imagesEnabled=false",
+]
+# フォントと動画は読み込まずに破棄する
+# URLで絞り込むことで、アップロード通信がPython側のルーティング処理を経由しないようにする
+BLOCKED_RESOURCE_PATTERN = re.compile(r"\.(woff2?|ttf|otf|eot|mp4|webm|mp3)(\?|$)", re.IGNORECASE)
+FILE_INPUT_SELECTOR = 'input[type="file"]'
+# 長時間の連続アップロードでブラウザのメモリが増え続けないよう、この件数ごとにコンテキストを作り直す
+CONTEXT_RECYCLE_UPLOADS = 25
+# ページを開いた時点でinputの配置は確認済みのため、消えていた場合に見切りをつけるまでの時間（秒）
+FILE_INPUT_TIMEOUT = 10
+# アプリ終了時にブラウザの終了を待つ最大時間（秒）
+CLOSE_TIMEOUT = 5
+# 事前に開いたページを遷移し直さずに使う期限（秒）、過ぎたらセッション切れに備えて開き直す
+WARM_PAGE_MAX_AGE = 300
+
 
 class MegaUploader:
     """MEGAファイルリクエストへのアップロードを実施"""
@@ -24,76 +50,325 @@ class MegaUploader:
         self.url = url
         self.upload_complete_text = get_upload_complete_text()
         self.max_wait_time = get_max_wait_time()
-        self.check_interval = get_check_interval()
         self.headless = get_headless()
         self.post_upload_wait = get_post_upload_wait()
-        logger.debug(f"MegaUploader初期化: post_upload_wait={self.post_upload_wait}秒")
-
-    @contextmanager
-    def _open_mega_page(self) -> Generator[Page, None, None]:
-        """Chromeブラウザを起動しMEGAページを開く"""
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=self.headless)
-            page = browser.new_page()
-            page.goto(self.url)
-            page.wait_for_load_state("networkidle")
-            try:
-                yield page
-            finally:
-                browser.close()
-                logger.debug("ブラウザを閉じました")
-
-    def _wait_for_upload_complete(self, page: Page) -> bool:
-        """指定したアップロード済み表示がなされるまで待機"""
-        elapsed = 0.0
-        while elapsed < self.max_wait_time:
-            if page.locator(f"text={self.upload_complete_text}").count() > 0:
-                logger.debug(f"「{self.upload_complete_text}」を検出しました（経過時間: {elapsed}秒）")
-                return True
-            time.sleep(self.check_interval)
-            elapsed += self.check_interval
-        logger.debug(f"「{self.upload_complete_text}」の検出がタイムアウトしました（経過時間: {elapsed}秒）")
-        return False
+        self.parallel_uploads = get_parallel_uploads()
+        logger.debug("MegaUploader初期化: post_upload_wait=%s秒", self.post_upload_wait)
+
+        # ブラウザは初回アップロード時に起動し、close()まで使い回す
+        self._playwright: Playwright | None = None
+        self._browser: Browser | None = None
+        self._page: Page | None = None
+        # 並行アップロード用に追加で開いたページ
+        self._extra_pages: list[Page] = []
+        # warm_up()で開いたまま未使用のページを開いた時刻（time.monotonic()）
+        self._page_ready_at: float | None = None
+        # 現在のコンテキストでアップロードを開始した件数
+        self._uploads_since_recycle = 0
+        # close()が呼ばれた後はブラウザを起動し直さない
+        self._closed = False
+        # Playwrightの同期APIは起動したスレッドからしか操作できないため専用スレッドで実行する
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='playwright')
+
+    def _ensure_page(self) -> Page:
+        """ブラウザが未起動なら起動してページを返す"""
+        if self._closed:
+            raise RuntimeError("アップローダーは終了済みです")
+        if self._browser is None:
+            self._playwright = sync_playwright().start()
+            self._browser = self._playwright.chromium.launch(headless=self.headless, args=CHROMIUM_ARGS)
+            logger.debug("ブラウザを起動しました")
+        if self._page is None:
+            self._page = self._prepare_page(self._browser.new_page())
+        return self._page
+
+    def _prepare_page(self, page: Page) -> Page:
+        """アップロードに不要なリソースを読み込まないようページを設定"""
+        page.route(BLOCKED_RESOURCE_PATTERN, lambda route: route.abort())
+        return page
 
-    def _upload_single_file(self, page: Page, file_path: Path) -> bool:
-        """1つのファイルをアップロードする"""
-        logger.info(f"アップロード開始: {file_path.name}")
+    def _get_upload_pages(self, count: int) -> list[Page]:
+        """メインページに加え、並行アップロード用のページを必要な数だけ用意する"""
+        main_page = self._ensure_page()
+        assert self._browser is not None
+        while len(self._extra_pages) < count - 1:
+            # Cookieやストレージを共有しない独立したセッションにするため別コンテキストで開く
+            self._extra_pages.append(self._prepare_page(self._browser.new_context().new_page()))
+        return [main_page, *self._extra_pages[:count - 1]]
 
+    def _recycle_contexts(self):
+        """溜まったリソースを解放するため、ブラウザは残したままページをコンテキストごと作り直す"""
+        for page in [self._page, *self._extra_pages]:
+            if page is not None:
+                # ルートハンドラーが残ったまま閉じるとPython側に参照が残るため先に解除する
+                page.unroute_all(behavior="ignoreErrors")
+                page.context.close()
+        self._page = None
+        self._extra_pages = []
+        self._page_ready_at = None
+        self._uploads_since_recycle = 0
+        logger.debug("ブラウザコンテキストを作り直しました")
+
+    def _navigate(self, page: Page):
+        """MEGAページへ遷移する"""
+        page.goto(self.url, wait_until="commit")
+        # DOM全体の読み込みやネットワークの静止を待たず、操作対象のinputが配置された時点で準備完了とする
+        self._file_input_locator(page).first.wait_for(state="attached")
+
+    def _open_mega_page(self) -> Page:
+        """起動済みのブラウザでMEGAページを開く"""
+        if self._uploads_since_recycle >= CONTEXT_RECYCLE_UPLOADS:
+            self._recycle_contexts()
+        page = self._ensure_page()
+        ready_at = self._page_ready_at
+        self._page_ready_at = None
+        if ready_at is not None and time.monotonic() - ready_at < WARM_PAGE_MAX_AGE:
+            # 事前に開いたばかりのページは遷移し直さずにそのまま使う
+            return page
+        self._navigate(page)
+        return page
+
+    def _close_browser(self):
+        """ブラウザとPlaywrightを終了する"""
+        if self._playwright is None:
+            return
         try:
-            # input[type="file"] を探してファイルをセットする
-            file_input = page.locator('input[type="file"]')
-
-            if file_input.count() > 0:
-                file_input.set_input_files(str(file_path))
-                logger.debug("ファイルを選択しました")
-
-                if self._wait_for_upload_complete(page):
-                    logger.info(f"アップロード完了: {file_path.name}")
-                    logger.debug(f"アップロード完了後の待機開始: {self.post_upload_wait}秒")
-                    time.sleep(self.post_upload_wait)
-                    logger.debug("アップロード完了後の待機終了")
-                    return True
-                else:
-                    logger.warning(f"完了確認がタイムアウトしました: {file_path.name}")
-                    return False
-            else:
-                logger.error("アップロード用のinputタグが見つかりませんでした")
-                return False
+            if self._browser:
+                self._browser.close()
+            self._playwright.stop()
+            logger.debug("ブラウザを閉じました")
+        except Exception as e:
+            logger.warning("ブラウザの終了に失敗しました: %s", e)
+        finally:
+            self._playwright = None
+            self._browser = None
+            self._page = None
+            self._extra_pages = []
+            self._page_ready_at = None
+            self._uploads_since_recycle = 0
 
+    def _warm_up(self):
+        """ブラウザを起動してMEGAページを開いておく"""
+        try:
+            self._open_mega_page()
+            self._page_ready_at = time.monotonic()
+            logger.debug("ブラウザの事前起動が完了しました")
         except Exception as e:
-            logger.error(f"アップロード失敗: {file_path.name} - {e}")
+            logger.warning("ブラウザの事前起動に失敗しました: %s", e)
+            self._close_browser()
+
+    def _file_input_locator(self, page: Page) -> Locator:
+        """ファイル選択inputのロケーターを返す"""
+        return page.locator(FILE_INPUT_SELECTOR)
+
+    def _upload_complete_locator(self, page: Page) -> Locator:
+        """アップロード済み表示のロケーターを返す"""
+        return page.get_by_text(self.upload_complete_text)
+
+    def _wait_for_upload_complete(self, page: Page, completed_count: int = 1) -> bool:
+        """アップロード済み表示がcompleted_count件目まで表示されるまで待機"""
+        # ページ内のDOM変化で待機が解除されるため、一定間隔でのポーリングは不要
+        # 同じページで前のファイルの完了表示が残っていても、新しい表示が出るまで待つ
+        try:
+            self._upload_complete_locator(page).nth(completed_count - 1).wait_for(
+                state="visible",
+                timeout=self.max_wait_time * 1000
+            )
+        except PlaywrightTimeoutError:
+            logger.debug("「%s」の検出がタイムアウトしました（%s秒）", self.upload_complete_text, self.max_wait_time)
             return False
+        logger.debug("「%s」を検出しました", self.upload_complete_text)
+        return True
 
-    def upload_file(self, file_path: Path) -> bool:
-        """指定された単一ファイルをMEGAにアップロードする"""
-        logger.info(f"MEGAへの接続: {file_path.name}")
+    def _start_upload(self, page: Page, file_path: Path) -> bool:
+        """ファイルをinputにセットしてアップロードを開始する"""
+        logger.info("アップロード開始: %s", file_path.name)
+
+        try:
+            # 事前にcount()で存在確認せず、セット時の自動待機で1往復にまとめる
+            self._file_input_locator(page).set_input_files(str(file_path), timeout=FILE_INPUT_TIMEOUT * 1000)
+            self._uploads_since_recycle += 1
+            logger.debug("ファイルを選択しました")
+            return True
+        except PlaywrightTimeoutError:
+            logger.error("アップロード用のinputタグが見つかりませんでした")
+            return False
+        except Exception as e:
+            logger.error("アップロード失敗: %s - %s", file_path.name, e)
+            return False
+
+    def _finish_upload(self, page: Page, file_path: Path, completed_count: int = 1) -> bool:
+        """開始したアップロードの完了を待つ"""
+        try:
+            if self._wait_for_upload_complete(page, completed_count):
+                logger.info("アップロード完了: %s", file_path.name)
+                return True
+            logger.warning("完了確認がタイムアウトしました: %s", file_path.name)
+            return False
+        except Exception as e:
+            logger.error("アップロード失敗: %s - %s", file_path.name, e)
+            return False
+
+    def _wait_after_upload(self):
+        """アップロード完了後に設定された時間だけ待機する"""
+        logger.debug("アップロード完了後の待機開始: %s秒", self.post_upload_wait)
+        time.sleep(self.post_upload_wait)
+        logger.debug("アップロード完了後の待機終了")
+
+    def _upload_single_file(self, page: Page, file_path: Path, completed_count: int = 1) -> bool:
+        """1つのファイルをアップロードし、このページでcompleted_count件目の完了表示を待つ"""
+        return self._start_upload(page, file_path) and self._finish_upload(page, file_path, completed_count)
+
+    def _upload_in_parallel(self, file_paths: list[Path], uploaded_files: list[Path]):
+        """
+        最大parallel_uploads枚のページに1件ずつ割り当てて並行してアップロードする
+
+        完了したファイルはuploaded_filesに追加するため、途中で例外が発生しても完了分は呼び出し元に残る
+
+        開始済みのアップロードを開始した順に1件ずつ待ち、待ち終えたページに次のファイルを割り当てる
+        同期APIでは複数ページを同時に待てないため、先に開始した遅いアップロードの待機中は
+        後から開始したページが完了していても次のファイルを割り当てない
+        メインページは呼び出し元で開いた直後であること
+        """
+        pending = deque(enumerate(file_paths, 1))
+        in_flight: deque[tuple[Page, Path]] = deque()
+        page_count = min(self.parallel_uploads, len(file_paths))
+        pages = self._get_upload_pages(page_count)
+        for page in pages[1:]:
+            self._navigate(page)
+        idle_pages = deque(pages)
+        # 同じページで何件目の完了表示を待つかをページごとに数える
+        completed_counts = dict.fromkeys(pages, 0)
+
+        while pending or in_flight:
+            if self._closed:
+                # 終了が要求されたら新しいファイルは開始せず、開始済みの分だけ待つ
+                pending.clear()
+            if not in_flight and self._uploads_since_recycle >= CONTEXT_RECYCLE_UPLOADS:
+                # 全ページが空いた時点でコンテキストを作り直して開き直す
+                self._open_mega_page()
+                pages = self._get_upload_pages(page_count)
+                for page in pages[1:]:
+                    self._navigate(page)
+                idle_pages = deque(pages)
+                completed_counts = dict.fromkeys(pages, 0)
+
+            while idle_pages and pending and self._uploads_since_recycle < CONTEXT_RECYCLE_UPLOADS:
+                page = idle_pages.popleft()
+                i, file_path = pending.popleft()
+                logger.info("進捗: %s/%s - %s", i, len(file_paths), file_path.name)
+                if self._start_upload(page, file_path):
+                    in_flight.append((page, file_path))
+                else:
+                    idle_pages.append(page)
+
+            if not in_flight:
+                continue
+            page, file_path = in_flight.popleft()
+            if self._finish_upload(page, file_path, completed_counts[page] + 1):
+                completed_counts[page] += 1
+                uploaded_files.append(file_path)
+            elif pending:
+                # タイムアウトしたファイルの完了表示が後から出ると件数がずれるため、開き直してから次を割り当てる
+                self._navigate(page)
+                completed_counts[page] = 0
+            idle_pages.append(page)
+
+        if uploaded_files:
+            self._wait_after_upload()
+
+    def _supports_multiple_files(self, page: Page) -> bool:
+        """ファイル選択inputが複数ファイルの同時選択に対応しているか判定"""
         try:
-            with self._open_mega_page() as page:
-                return self._upload_single_file(page, file_path)
+            multiple = self._file_input_locator(page).get_attribute("multiple", timeout=FILE_INPUT_TIMEOUT * 1000)
+        except PlaywrightTimeoutError:
+            return False
+        return multiple is not None
+
+    def _start_bulk_upload(self, page: Page, file_paths: list[Path]) -> bool:
+        """全ファイルをまとめてinputにセットしてアップロードを開始する"""
+        logger.info("%s件のファイルをまとめてアップロード開始", len(file_paths))
+        try:
+            self._file_input_locator(page).set_input_files(
+                [str(file_path) for file_path in file_paths],
+                timeout=FILE_INPUT_TIMEOUT * 1000
+            )
         except Exception as e:
-            logger.error(f"Playwrightによるアップロード失敗: {e}")
+            logger.warning("ファイルをまとめて選択できませんでした: %s", e)
+            return False
+        self._uploads_since_recycle += len(file_paths)
+        return True
+
+    def _finish_bulk_upload(self, page: Page, file_paths: list[Path]) -> bool:
+        """まとめて開始したアップロードの完了を待つ"""
+        # 並行してアップロードされるため、全件の完了表示が揃うまで待機する
+        try:
+            expect(self._upload_complete_locator(page)).to_have_count(
+                len(file_paths),
+                timeout=self.max_wait_time * len(file_paths) * 1000
+            )
+        except AssertionError:
+            logger.error("一括アップロードの完了を確認できませんでした: %s件", len(file_paths))
             return False
 
+        logger.info("一括アップロード完了: %s件", len(file_paths))
+        time.sleep(self.post_upload_wait)
+        return True
+
+    def _upload_in_session(self, file_paths: list[Path]) -> list[Path]:
+        """起動済みのブラウザでファイルをアップロードする"""
+        uploaded_files: list[Path] = []
+        # 終了後に残っていたバッチ処理からブラウザを起動し直さない
+        if self._closed:
+            logger.warning("アップローダーは終了済みのためアップロードしません")
+            return uploaded_files
+
+        try:
+            page = self._open_mega_page()
+            if len(file_paths) > 1 and self._supports_multiple_files(page):
+                if self._start_bulk_upload(page, file_paths):
+                    # 選択済みのファイルはページ上でアップロードが続くため、完了を確認できなくても送り直さない
+                    if self._finish_bulk_upload(page, file_paths):
+                        return list(file_paths)
+                    return uploaded_files
+                logger.warning("1件ずつアップロードします")
+                page = self._open_mega_page()
+
+            if self.parallel_uploads > 1 and len(file_paths) > 1:
+                self._upload_in_parallel(file_paths, uploaded_files)
+                return uploaded_files
+
+            # 完了表示の件数で次のファイルの完了を判定するため、ファイル間で固定時間待機しない
+            completed_on_page = 0
+            needs_reload = False
+            for i, file_path in enumerate(file_paths, 1):
+                if self._closed:
+                    break
+                if needs_reload or self._uploads_since_recycle >= CONTEXT_RECYCLE_UPLOADS:
+                    page = self._open_mega_page()
+                    completed_on_page = 0
+                    needs_reload = False
+                logger.info("進捗: %s/%s - %s", i, len(file_paths), file_path.name)
+                if self._upload_single_file(page, file_path, completed_on_page + 1):
+                    completed_on_page += 1
+                    uploaded_files.append(file_path)
+                else:
+                    # 失敗したファイルの完了表示が後から出ると件数がずれるため、次のファイルの前にページを開き直す
+                    needs_reload = True
+            if uploaded_files:
+                self._wait_after_upload()
+        except Exception as e:
+            logger.error("Playwrightによるアップロード失敗: %s", e)
+            # 異常終了したブラウザを使い回さないよう次回は起動し直す
+            self._close_browser()
+
+        return uploaded_files
+
+    def upload_file(self, file_path: Path) -> bool:
+        """指定された単一ファイルをMEGAにアップロードする"""
+        logger.info("MEGAへの接続: %s", file_path.name)
+        return bool(self.upload_files([file_path]))
+
     def upload_files(self, file_paths: list[Path]) -> list[Path]:
         """
         複数ファイルをMEGAにアップロードする
@@ -108,17 +383,22 @@ class MegaUploader:
             logger.info("アップロードするファイルがありません")
             return []
 
-        logger.info(f"{len(file_paths)}件のファイルをアップロードします")
-        uploaded_files: list[Path] = []
-
-        try:
-            with self._open_mega_page() as page:
-                for i, file_path in enumerate(file_paths, 1):
-                    logger.info(f"進捗: {i}/{len(file_paths)} - {file_path.name}")
-                    if self._upload_single_file(page, file_path):
-                        uploaded_files.append(file_path)
-        except Exception as e:
-            logger.error(f"Playwrightによるアップロード失敗: {e}")
+        logger.info("%s件のファイルをアップロードします", len(file_paths))
+        uploaded_files = self._executor.submit(self._upload_in_session, file_paths).result()
 
-        logger.info(f"{len(uploaded_files)}/{len(file_paths)}件のファイルをアップロードしました")
+        logger.info("%s/%s件のファイルをアップロードしました", len(uploaded_files), len(file_paths))
         return uploaded_files
+
+    def warm_up(self):
+        """初回アップロードに備えてブラウザをバックグラウンドで起動する（完了は待たない）"""
+        self._executor.submit(self._warm_up)
+
+    def close(self):
+        """起動中のブラウザを終了する（実行中のアップロードがあっても一定時間で戻る）"""
+        self._closed = True
+        future = self._executor.submit(self._close_browser)
+        try:
+            future.result(timeout=CLOSE_TIMEOUT)
+        except TimeoutError:
+            # ブラウザは実行中のアップロードが終わった後に専用スレッドで閉じられる
+            logger.warning("実行中のアップロードがあるため、ブラウザの終了を待たずに戻ります")
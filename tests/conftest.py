@@ -0,0 +1,11 @@
+import pytest
+
+from utils.config_manager import invalidate_config
+
+
+@pytest.fixture(autouse=True)
+def fresh_config():
+    """テスト間で共有設定のキャッシュを持ち越さない"""
+    invalidate_config()
+    yield
+    invalidate_config()
@@ -0,0 +1,141 @@
+import configparser
+import logging
+import re
+from unittest.mock import patch
+
+import pytest
+
+from utils import config_manager
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    """一時的な設定ファイルを提供"""
+    path = tmp_path / 'config.ini'
+    path.write_text(
+        "[App]\nbatch_delay = 2.5\nwait_time = 0.5\n\n"
+        "[Uploader]\nheadless = false\nparallel_uploads = 0\n",
+        encoding='utf-8'
+    )
+    with patch.object(config_manager, 'CONFIG_PATH', str(path)):
+        yield path
+
+
+class TestSharedConfig:
+    """getter間で共有する設定読み込みのテスト"""
+
+    def test_getters_read_file_once(self, config_file):
+        """複数のgetterを呼んでも設定ファイルは1回だけ読み込む"""
+        with patch.object(config_manager, 'load_config', wraps=config_manager.load_config) as mock_load:
+            assert config_manager.get_batch_delay() == 2.5
+            assert config_manager.get_wait_time() == 0.5
+            assert config_manager.get_headless() is False
+
+        mock_load.assert_called_once()
+
+    def test_getters_reuse_converted_values(self, config_file):
+        """変換済みの値は共有設定を参照し直さずに返す"""
+        with patch.object(config_manager, '_load_shared_config',
+                          wraps=config_manager._load_shared_config) as mock_shared:
+            assert config_manager.get_batch_delay() == 2.5
+            assert config_manager.get_batch_delay() == 2.5
+
+        mock_shared.assert_called_once()
+
+    def test_rename_pattern_is_compiled_once(self, config_file):
+        """ファイル名変換用のパターンは1回だけコンパイルして使い回す"""
+        config_file.write_text("[filename]\npattern = _\\d+\n", encoding='utf-8')
+
+        with patch.object(re, 'compile', wraps=re.compile) as mock_compile:
+            pattern = config_manager.get_rename_pattern()
+            assert config_manager.get_rename_pattern() is pattern
+
+        assert pattern.pattern == r'_\d+$'
+        mock_compile.assert_called_once()
+
+    def test_load_config_returns_fresh_parser(self, config_file):
+        """load_configは呼び出し側が変更できるよう毎回新しいパーサーを返す"""
+        assert config_manager.load_config() is not config_manager.load_config()
+
+    def test_save_config_invalidates_cache(self, config_file):
+        """保存後のgetterは新しい値を返す"""
+        assert config_manager.get_batch_delay() == 2.5
+
+        config = config_manager.load_config()
+        config['App']['batch_delay'] = '4.0'
+        config_manager.save_config(config)
+
+        assert config_manager.get_batch_delay() == 4.0
+
+    def test_parallel_uploads_is_at_least_one(self, config_file):
+        """並行数は最低1に補正される"""
+        assert config_manager.get_parallel_uploads() == 1
+
+    def test_missing_file_is_not_cached(self, tmp_path):
+        """読み込みに失敗した場合はキャッシュせず再試行する"""
+        path = tmp_path / 'config.ini'
+        with patch.object(config_manager, 'CONFIG_PATH', str(path)):
+            with pytest.raises(FileNotFoundError):
+                config_manager.get_batch_delay()
+
+            config = configparser.ConfigParser()
+            config['App'] = {'batch_delay': '1.5'}
+            config_manager.save_config(config)
+
+            assert config_manager.get_batch_delay() == 1.5
+
+    def test_invalidate_config_rereads_file(self, config_file):
+        """invalidate_config後のgetterはファイルを読み直す"""
+        assert config_manager.get_wait_time() == 0.5
+
+        config_file.write_text("[App]\nwait_time = 1.0\n", encoding='utf-8')
+        assert config_manager.get_wait_time() == 0.5
+
+        config_manager.invalidate_config()
+        assert config_manager.get_wait_time() == 1.0
+
+
+class TestLoadConfigErrors:
+    """設定読み込み失敗時のテスト"""
+
+    def test_missing_file_is_logged(self, tmp_path, caplog):
+        """設定ファイルが無い場合はログに記録して例外を送出する"""
+        path = tmp_path / 'missing.ini'
+        with patch.object(config_manager, 'CONFIG_PATH', str(path)), caplog.at_level(logging.ERROR):
+            with pytest.raises(FileNotFoundError):
+                config_manager.load_config()
+
+        assert "設定ファイルが見つかりません" in caplog.text
+
+    def test_invalid_pattern_is_logged(self, config_file, caplog):
+        """無効な正規表現パターンはログに記録して例外を送出する"""
+        config_file.write_text("[filename]\npattern = (unclosed\n", encoding='utf-8')
+
+        with caplog.at_level(logging.ERROR), pytest.raises(re.error):
+            config_manager.get_rename_pattern()
+
+        assert "正規表現パターンが無効です" in caplog.text
+
+
+class TestGetConfigValue:
+    """get_config_valueの型変換のテスト"""
+
+    @pytest.mark.parametrize("value, expected", [
+        ("true", True),
+        ("On", True),
+        ("1", True),
+        ("false", False),
+        ("off", False),
+    ])
+    def test_bool_values(self, value, expected):
+        """bool型の既定値では真とみなす文字列だけをTrueにする"""
+        config = configparser.ConfigParser()
+        config['App'] = {'flag': value}
+
+        assert config_manager.get_config_value(config, 'App', 'flag', False) is expected
+
+    def test_missing_key_returns_default(self):
+        """キーが無い場合は既定値を返す"""
+        config = configparser.ConfigParser()
+
+        assert config_manager.get_config_value(config, 'App', 'count', 3) == 3
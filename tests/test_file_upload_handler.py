@@ -1,14 +1,13 @@
 import logging
 import re
 import threading
-import time
 from pathlib import Path
 from unittest.mock import MagicMock, call, patch
 
 import pytest
 from watchdog.events import FileCreatedEvent, FileMovedEvent
 
-from service.file_upload_handler import FileUploadHandler
+from service.file_upload_handler import STABILITY_CHECK_INTERVAL, FileUploadHandler
 
 
 @pytest.fixture
@@ -42,10 +41,37 @@ def mock_uploader():
         yield mock_instance
 
 
+class FakeClock:
+    """sleepした分だけ進む仮想時計"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture(autouse=True)
+def fake_clock():
+    """書き込み完了待機で実時間を消費しないよう、ハンドラーが使う時計を差し替える"""
+    clock = FakeClock()
+    with patch('service.file_upload_handler.time', clock):
+        yield clock
+
+
 @pytest.fixture
 def handler(mock_config, mock_uploader):
     """テスト用のFileUploadHandlerインスタンスを提供"""
-    return FileUploadHandler()
+    handler = FileUploadHandler()
+    yield handler
+    # 後続のテスト中にバッチ処理が走らないよう、残ったタイマーを止める
+    if handler._timer:
+        handler._timer.cancel()
 
 
 class TestFileUploadHandlerInit:
@@ -62,7 +88,7 @@ class TestFileUploadHandlerInit:
 
     def test_init_creates_empty_queue(self, handler):
         """初期化時にキューが空である"""
-        assert handler._pending_files == []
+        assert handler._pending_files == {}
         assert handler._timer is None
 
     def test_init_creates_lock(self, handler):
@@ -181,19 +207,81 @@ class TestFileUploadHandlerAddToQueue:
             handler._add_to_queue(str(test_file))
             handler._add_to_queue(str(test_file))
 
-            assert handler._pending_files.count(test_file) == 1
+            assert list(handler._pending_files) == [test_file]
 
-    def test_add_to_queue_waits_for_file_completion(self, handler, tmp_path):
-        """ファイル書き込み完了を待つ"""
+    def test_add_to_queue_does_not_block_event_thread(self, handler, tmp_path, fake_clock):
+        """監視スレッドでは書き込み完了を待たない"""
         test_file = tmp_path / "test_file.txt"
         test_file.write_text("content")
 
-        start_time = time.time()
         with patch.object(handler, '_reset_timer'):
             handler._add_to_queue(str(test_file))
-        elapsed = time.time() - start_time
 
-        assert elapsed >= handler.wait_time
+            assert fake_clock.sleeps == []
+            assert test_file in handler._pending_files
+
+    def test_add_to_queue_logs_outside_lock(self, handler, tmp_path):
+        """ログ出力中はロックを保持しない"""
+        test_file = tmp_path / "test_file.txt"
+        test_file.write_text("content")
+        lock_states = []
+
+        with patch.object(handler, '_reset_timer'), \
+             patch('service.file_upload_handler.logger') as mock_logger:
+            mock_logger.info.side_effect = lambda *args: lock_states.append(handler._lock.locked())
+            handler._add_to_queue(str(test_file))
+
+        assert lock_states == [False, False]
+
+
+class TestFileUploadHandlerWaitUntilStable:
+    """書き込み完了待機のテスト"""
+
+    def test_wait_until_stable_returns_early_for_written_file(self, handler, tmp_path, fake_clock):
+        """書き込み済みのファイルは待機時間の上限を待たずに完了する"""
+        test_file = tmp_path / "test_file.txt"
+        test_file.write_text("content")
+        handler.wait_time = 5.0
+
+        assert handler._wait_until_stable([test_file]) == [test_file]
+        assert fake_clock.sleeps == [STABILITY_CHECK_INTERVAL]
+
+    def test_wait_until_stable_shares_wait_between_files(self, handler, tmp_path, fake_clock):
+        """複数ファイルでも確認は1回の待機でまとめて行う"""
+        files = [tmp_path / f"test_{i}.txt" for i in range(5)]
+        for f in files:
+            f.write_text("content")
+        handler.wait_time = 5.0
+
+        assert handler._wait_until_stable(files) == files
+        assert fake_clock.sleeps == [STABILITY_CHECK_INTERVAL]
+
+    def test_wait_until_stable_waits_while_growing(self, handler, tmp_path, fake_clock):
+        """サイズが変化している間は待機を続ける"""
+        test_file = tmp_path / "test_file.txt"
+        test_file.write_text("c")
+        handler.wait_time = 5.0
+        sizes = iter([1, 2, 3, 3])
+
+        with patch.object(Path, 'stat', side_effect=lambda: MagicMock(st_size=next(sizes))):
+            assert handler._wait_until_stable([test_file]) == [test_file]
+            assert len(fake_clock.sleeps) == 3
+
+    def test_wait_until_stable_gives_up_after_wait_time(self, handler, tmp_path, fake_clock):
+        """空のままのファイルは上限時間の経過後に処理対象とする"""
+        test_file = tmp_path / "test_file.txt"
+        test_file.touch()
+        handler.wait_time = 0.2
+
+        assert handler._wait_until_stable([test_file]) == [test_file]
+        assert fake_clock.now >= 0.2
+
+    def test_wait_until_stable_missing_file(self, handler, tmp_path):
+        """存在しないファイルは結果から除外する"""
+        test_file = tmp_path / "test_file.txt"
+        test_file.write_text("content")
+
+        assert handler._wait_until_stable([tmp_path / "test_missing.txt", test_file]) == [test_file]
 
 
 class TestFileUploadHandlerResetTimer:
@@ -251,7 +339,7 @@ class TestFileUploadHandlerProcessPendingFiles:
         test_file1.write_text("content1")
         test_file2.write_text("content2")
 
-        handler._pending_files = [test_file1, test_file2]
+        handler._pending_files = dict.fromkeys([test_file1, test_file2])
         handler.uploader.upload_files.return_value = [test_file1, test_file2]
 
         handler._process_pending_files()
@@ -267,7 +355,7 @@ class TestFileUploadHandlerProcessPendingFiles:
         test_file1.write_text("content1")
         test_file2.write_text("content2")
 
-        handler._pending_files = [test_file1, test_file2]
+        handler._pending_files = dict.fromkeys([test_file1, test_file2])
         handler.uploader.upload_files.return_value = [test_file1]
 
         handler._process_pending_files()
@@ -275,12 +363,32 @@ class TestFileUploadHandlerProcessPendingFiles:
         assert not test_file1.exists()
         assert test_file2.exists()
 
+    def test_process_pending_files_skips_removed_files(self, handler, tmp_path):
+        """キューに入った後に削除されたファイルはアップロードしない"""
+        test_file = tmp_path / "test_file.txt"
+        removed_file = tmp_path / "test_removed.txt"
+        test_file.write_text("content")
+
+        handler._pending_files = dict.fromkeys([test_file, removed_file])
+
+        handler._process_pending_files()
+
+        handler.uploader.upload_files.assert_called_once_with([test_file])
+
+    def test_process_pending_files_all_removed(self, handler, tmp_path):
+        """すべて削除済みの場合はアップロードしない"""
+        handler._pending_files = dict.fromkeys([tmp_path / "test_removed.txt"])
+
+        handler._process_pending_files()
+
+        handler.uploader.upload_files.assert_not_called()
+
     def test_process_pending_files_clears_queue(self, handler, tmp_path):
         """処理後にキューがクリアされる"""
         test_file = tmp_path / "test_file.txt"
         test_file.write_text("content")
 
-        handler._pending_files = [test_file]
+        handler._pending_files = dict.fromkeys([test_file])
         handler.uploader.upload_files.return_value = [test_file]
 
         handler._process_pending_files()
@@ -294,7 +402,7 @@ class TestFileUploadHandlerProcessPendingFiles:
         test_file1.write_text("content1")
         test_file2.write_text("content2")
 
-        handler._pending_files = [test_file1, test_file2]
+        handler._pending_files = dict.fromkeys([test_file1, test_file2])
         handler.uploader.upload_files.return_value = [test_file1]
 
         with caplog.at_level(logging.WARNING):
@@ -337,6 +445,8 @@ class TestFileUploadHandlerDeleteUploadedFiles:
             handler._delete_uploaded_files([non_existing])
 
             assert "すべてのファイルの削除処理が完了しました" in caplog.text
+            assert "削除完了" not in caplog.text
+            assert "削除失敗" not in caplog.text
 
     def test_delete_uploaded_files_permission_error(self, handler, tmp_path, caplog):
         """削除失敗時にログ出力"""
@@ -349,6 +459,36 @@ class TestFileUploadHandlerDeleteUploadedFiles:
 
                 assert "削除失敗" in caplog.text
 
+    def test_delete_uploaded_files_continues_after_error(self, handler, tmp_path, caplog):
+        """一部の削除に失敗しても残りのファイルは削除される"""
+        locked_file = tmp_path / "test_locked.txt"
+        other_file = tmp_path / "test_other.txt"
+        locked_file.write_text("content1")
+        other_file.write_text("content2")
+        original_unlink = Path.unlink
+
+        def unlink_except_locked(self):
+            if self == locked_file:
+                raise PermissionError("Access denied")
+            original_unlink(self)
+
+        with patch.object(Path, 'unlink', unlink_except_locked):
+            with caplog.at_level(logging.INFO):
+                handler._delete_uploaded_files([locked_file, other_file])
+
+        assert locked_file.exists()
+        assert not other_file.exists()
+        log_text = caplog.text
+        assert "削除失敗: test_locked.txt" in log_text
+        assert "削除完了: test_other.txt" in log_text
+
+    def test_delete_uploaded_files_empty_list(self, handler, caplog):
+        """空のリストでもエラーにならない"""
+        with caplog.at_level(logging.INFO):
+            handler._delete_uploaded_files([])
+
+            assert "すべてのファイルの削除処理が完了しました" in caplog.text
+
 
 class TestFileUploadHandlerGetPendingCount:
     """待機中ファイル数取得のテスト"""
@@ -359,11 +499,11 @@ class TestFileUploadHandlerGetPendingCount:
 
     def test_get_pending_count_with_files(self, handler, tmp_path):
         """キューにファイルがある場合はその数"""
-        handler._pending_files = [
+        handler._pending_files = dict.fromkeys([
             tmp_path / "test1.txt",
             tmp_path / "test2.txt",
             tmp_path / "test3.txt"
-        ]
+        ])
 
         assert handler.get_pending_count() == 3
 
@@ -372,11 +512,11 @@ class TestFileUploadHandlerGetPendingCount:
         # 複数スレッドから同時にアクセスしても正しい値が取得できる
         import concurrent.futures
 
-        handler._pending_files = [
+        handler._pending_files = dict.fromkeys([
             tmp_path / "test1.txt",
             tmp_path / "test2.txt",
             tmp_path / "test3.txt"
-        ]
+        ])
 
         results = []
         def get_count():
@@ -408,7 +548,7 @@ class TestFileUploadHandlerProcessNow:
         test_file = tmp_path / "test_file.txt"
         test_file.write_text("content")
 
-        handler._pending_files = [test_file]
+        handler._pending_files = dict.fromkeys([test_file])
         handler.uploader.upload_files.return_value = [test_file]
 
         handler.process_now()
@@ -455,6 +595,34 @@ class TestFileUploadHandlerScanExistingFiles:
 
         assert test_dir not in handler._pending_files
 
+    def test_scan_existing_files_matches_stem(self, handler, tmp_path):
+        """拡張子を除いたファイル名でパターン判定する"""
+        no_extension = tmp_path / "test_file"
+        multi_dots = tmp_path / "test_file.tar.gz"
+        extension_only = tmp_path / "other.test"
+        for f in (no_extension, multi_dots, extension_only):
+            f.write_text("content")
+
+        handler.scan_existing_files(str(tmp_path))
+
+        assert no_extension in handler._pending_files
+        assert multi_dots in handler._pending_files
+        assert extension_only not in handler._pending_files
+
+    @pytest.mark.parametrize('name', ["x_test.", "x_test.txt", "..test", ".test", "test"])
+    def test_scan_existing_files_matches_like_events(self, handler, tmp_path, name):
+        """既存ファイルのスキャンと監視イベントで同じファイル名の判定が一致する"""
+        handler._pattern_search = re.compile(r'test$').search
+        test_file = tmp_path / name
+        test_file.write_text("content")
+
+        handler.scan_existing_files(str(tmp_path))
+        matched_by_scan = test_file in handler._pending_files
+        handler._pending_files.clear()
+        handler._add_to_queue(str(test_file))
+
+        assert matched_by_scan == (test_file in handler._pending_files)
+
     def test_scan_existing_files_non_existing_directory(self, handler):
         """存在しないディレクトリは何もしない"""
         handler.scan_existing_files(r'C:\non_existing\dir')
@@ -486,11 +654,25 @@ class TestFileUploadHandlerScanExistingFiles:
         test_file = tmp_path / "test_file.txt"
         test_file.write_text("content")
 
-        handler._pending_files = [test_file]
+        handler._pending_files = dict.fromkeys([test_file])
 
         handler.scan_existing_files(str(tmp_path))
 
-        assert handler._pending_files.count(test_file) == 1
+        assert list(handler._pending_files) == [test_file]
+
+    def test_scan_existing_files_counts_only_new_files(self, handler, tmp_path, caplog):
+        """キュー済みのファイルは件数に含めず、元の順番を保つ"""
+        queued_file = tmp_path / "test_b.txt"
+        new_file = tmp_path / "test_a.txt"
+        queued_file.write_text("content")
+        new_file.write_text("content")
+        handler._pending_files = dict.fromkeys([queued_file])
+
+        with patch.object(handler, '_reset_timer'), caplog.at_level(logging.INFO):
+            handler.scan_existing_files(str(tmp_path))
+
+        assert list(handler._pending_files) == [queued_file, new_file]
+        assert "1件の既存ファイルをキューに追加しました" in caplog.text
 
 
 class TestFileUploadHandlerEdgeCases:
@@ -519,7 +701,7 @@ class TestFileUploadHandlerEdgeCases:
         test_file = tmp_path / "test_file.txt"
         test_file.write_text("content")
 
-        handler._pending_files = [test_file]
+        handler._pending_files = dict.fromkeys([test_file])
         handler.uploader.upload_files.return_value = [test_file]
 
         # ロックが正しく使われることを確認
@@ -567,3 +749,25 @@ class TestFileUploadHandlerEdgeCases:
                 handler._add_to_queue(str(f))
 
         assert len(handler._pending_files) == 10
+
+
+class TestFileUploadHandlerClose:
+    """終了処理のテスト"""
+
+    def test_close_cancels_timer_and_closes_uploader(self, handler):
+        """タイマーを止めてアップローダーを終了する"""
+        mock_timer = MagicMock(spec=threading.Timer)
+        handler._timer = mock_timer
+
+        handler.close()
+
+        mock_timer.cancel.assert_called_once()
+        handler.uploader.close.assert_called_once()
+
+    def test_close_without_timer(self, handler):
+        """タイマーがない場合でもアップローダーを終了する"""
+        handler._timer = None
+
+        handler.close()
+
+        handler.uploader.close.assert_called_once()
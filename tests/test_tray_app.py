@@ -1,325 +1,393 @@
 import logging
+import os
 from unittest.mock import MagicMock, patch
 
 import pytest
 from PIL import Image
+from watchdog.events import FileCreatedEvent, FileMovedEvent
 from watchdog.observers import Observer
 
 from app.tray_app import TrayApp
 
 
 @pytest.fixture
-def mock_config():
+def mock_config(mocker):
     """設定のモックを提供"""
-    with patch('app.tray_app.get_src_dir') as mock_get_src_dir:
-        mock_get_src_dir.return_value = r'C:\test\src'
-        yield mock_get_src_dir
+    return mocker.patch('app.tray_app.get_src_dir', return_value=r'C:\test\src')
 
 
 @pytest.fixture
-def mock_observer():
+def src_dir_exists(mocker):
+    """監視フォルダが存在するものとして扱う（os.path.isdir自体は差し替えない）"""
+    return mocker.patch.object(TrayApp, '_validate_src_dir')
+
+
+@pytest.fixture
+def app(mock_config, src_dir_exists):
+    """監視フォルダが存在するものとして作成したTrayAppを提供"""
+    return TrayApp()
+
+
+@pytest.fixture(scope='module')
+def readonly_app():
+    """状態を変更しないテストで共有するTrayAppを提供"""
+    with patch('app.tray_app.get_src_dir', return_value=r'C:\test\src'), \
+         patch.object(TrayApp, '_validate_src_dir'):
+        return TrayApp()
+
+
+@pytest.fixture
+def mock_observer(mocker):
     """Observerのモックを提供"""
-    with patch('app.tray_app.Observer') as mock_obs:
-        yield mock_obs
+    return mocker.patch('app.tray_app.Observer')
 
 
 @pytest.fixture
-def mock_pystray():
+def mock_pystray(mocker):
     """pystrayのモックを提供"""
-    with patch('app.tray_app.pystray') as mock_ps:
-        yield mock_ps
+    return mocker.patch('app.tray_app.pystray')
 
 
 @pytest.fixture
-def mock_subprocess():
-    """subprocessのモックを提供"""
-    with patch('app.tray_app.subprocess') as mock_sp:
-        yield mock_sp
+def mock_startfile(mocker):
+    """os.startfileのモックを提供（Windows以外にはないため作成して差し替える）"""
+    return mocker.patch('app.tray_app.os.startfile', create=True)
 
 
 class TestTrayAppInit:
     """TrayAppの初期化テスト"""
 
-    def test_init_success(self, mock_config):
+    def test_init_success(self, readonly_app):
         """正常な初期化"""
-        with patch('os.path.exists', return_value=True):
-            app = TrayApp()
-            assert app.src_dir == r'C:\test\src'
-            assert app.observer is None
-            assert app.icon is None
+        assert readonly_app.src_dir == r'C:\test\src'
+        assert readonly_app.src_dir_name == os.path.basename(os.path.normpath(r'C:\test\src'))
+        assert readonly_app.observer is None
+        assert readonly_app.icon is None
 
-    def test_init_with_missing_src_dir(self, mock_config):
+    def test_init_with_missing_src_dir(self, mocker, mock_config):
         """監視フォルダが存在しない場合はsys.exitを呼ぶ"""
-        with patch('os.path.exists', return_value=False):
-            with pytest.raises(SystemExit) as excinfo:
-                TrayApp()
-            assert excinfo.value.code == 1
+        mocker.patch('os.path.isdir', return_value=False)
+        with pytest.raises(SystemExit) as excinfo:
+            TrayApp()
+        assert excinfo.value.code == 1
+
+    def test_init_with_file_as_src_dir(self, mock_config, tmp_path):
+        """監視フォルダのパスがファイルの場合もsys.exitを呼ぶ"""
+        src_file = tmp_path / "src.txt"
+        src_file.write_text("content")
+        mock_config.return_value = str(src_file)
 
-    def test_validate_src_dir_logs_error(self, mock_config, caplog):
+        with pytest.raises(SystemExit):
+            TrayApp()
+
+    def test_validate_src_dir_logs_error(self, mocker, mock_config, caplog):
         """監視フォルダが存在しない場合のログ出力"""
-        with patch('os.path.exists', return_value=False):
-            with caplog.at_level(logging.ERROR):
-                with pytest.raises(SystemExit):
-                    TrayApp()
-            assert "監視フォルダが存在しません" in caplog.text
+        mocker.patch('os.path.isdir', return_value=False)
+        with caplog.at_level(logging.ERROR):
+            with pytest.raises(SystemExit):
+                TrayApp()
+        assert "監視フォルダが存在しません" in caplog.text
 
 
 class TestTrayAppIconCreation:
     """アイコン作成のテスト"""
 
-    def test_create_icon_image_returns_pil_image(self, mock_config):
+    def test_create_icon_image_returns_pil_image(self, readonly_app):
         """アイコン画像が正しく作成される"""
-        with patch('os.path.exists', return_value=True):
-            app = TrayApp()
-            image = app._create_icon_image()
-            assert isinstance(image, Image.Image)
-            assert image.size == (64, 64)
-            assert image.mode == 'RGBA'
+        image = readonly_app._create_icon_image()
+        assert isinstance(image, Image.Image)
+        assert image.size == (64, 64)
+        assert image.mode == 'RGBA'
+
+    def test_create_icon_image_is_cached(self, readonly_app):
+        """アイコン画像は初回のみ描画され以降は同じ画像を返す"""
+        assert readonly_app._create_icon_image() is readonly_app._create_icon_image()
 
 
 class TestTrayAppFolderOperations:
     """フォルダ操作のテスト"""
 
-    def test_open_folder_calls_subprocess(self, mock_config, mock_subprocess):
+    def test_open_folder_calls_startfile(self, readonly_app, mock_startfile):
         """監視フォルダを開く処理が正しく実行される"""
-        with patch('os.path.exists', return_value=True):
-            app = TrayApp()
-            app._open_folder()
-            mock_subprocess.Popen.assert_called_once_with(['explorer', r'C:\test\src'])
+        readonly_app._open_folder()
+        mock_startfile.assert_called_once_with(r'C:\test\src')
 
 
 class TestTrayAppQuitApp:
     """アプリケーション終了のテスト"""
 
-    def test_quit_app_stops_observer_and_icon(self, mock_config, caplog):
+    def test_quit_app_stops_observer_and_icon(self, app, caplog):
         """終了時にobserverとiconを停止"""
-        with patch('os.path.exists', return_value=True):
-            app = TrayApp()
-            app.observer = MagicMock(spec=Observer)
-            app.icon = MagicMock()
+        app.observer = MagicMock(spec=Observer)
+        app.icon = MagicMock()
 
-            with caplog.at_level(logging.INFO):
-                app._quit_app()
+        with caplog.at_level(logging.INFO):
+            app._quit_app()
 
-            app.observer.stop.assert_called_once()
-            app.observer.join.assert_called_once()
-            app.icon.stop.assert_called_once()
-            assert "アプリケーションを終了します" in caplog.text
+        app.observer.stop.assert_called_once()
+        app.observer.join.assert_called_once()
+        app.icon.stop.assert_called_once()
+        assert "アプリケーションを終了します" in caplog.text
 
-    def test_quit_app_without_icon(self, mock_config):
+    def test_quit_app_without_icon(self, app):
         """iconがNoneの場合でも正常終了"""
-        with patch('os.path.exists', return_value=True):
-            app = TrayApp()
-            app.observer = MagicMock(spec=Observer)
-            app.icon = None
+        app.observer = MagicMock(spec=Observer)
+        app.icon = None
 
-            app._quit_app()
-            app.observer.stop.assert_called_once()
+        app._quit_app()
+        app.observer.stop.assert_called_once()
 
-    def test_quit_app_without_observer(self, mock_config):
+    def test_quit_app_without_observer(self, app):
         """observerがNoneの場合でも正常終了"""
-        with patch('os.path.exists', return_value=True):
-            app = TrayApp()
-            app.observer = None
-            app.icon = MagicMock()
+        app.observer = None
+        app.icon = MagicMock()
 
-            app._quit_app()
-            app.icon.stop.assert_called_once()
+        app._quit_app()
+        app.icon.stop.assert_called_once()
 
 
 class TestTrayAppMenu:
     """メニュー作成のテスト"""
 
-    def test_create_menu_structure(self, mock_config, mock_pystray):
+    def test_create_menu_structure(self, readonly_app, mock_pystray):
         """メニューが正しい構造で作成される"""
-        with patch('os.path.exists', return_value=True):
-            app = TrayApp()
-            menu = app._create_menu()
+        menu = readonly_app._create_menu()
+
+        # pystray.Menuが呼ばれたことを確認
+        assert mock_pystray.Menu.called
+
+    def test_menu_uses_folder_name_without_trailing_separator(self, mock_config, src_dir_exists, mock_pystray):
+        """末尾に区切り文字があってもフォルダ名が表示される"""
+        mock_config.return_value = os.path.join('test', 'monitoring') + os.sep
+        app = TrayApp()
 
-            # pystray.Menuが呼ばれたことを確認
-            assert mock_pystray.Menu.called
+        app._create_menu()
 
-    def test_menu_displays_correct_folder_name(self, mock_config, mock_pystray):
+        first_item_kwargs = mock_pystray.MenuItem.call_args_list[0][1]
+        assert first_item_kwargs['text'] == "監視中: monitoring"
+
+    def test_menu_displays_correct_folder_name(self, mocker, mock_config, src_dir_exists, mock_pystray):
         """メニューに正しいフォルダ名が表示される"""
-        with patch('os.path.exists', return_value=True):
-            mock_config.return_value = r'C:\test\monitoring'
-            app = TrayApp()
-            app.src_dir = r'C:\test\monitoring'
+        mock_config.return_value = r'C:\test\monitoring'
+        app = TrayApp()
+        app.src_dir = r'C:\test\monitoring'
 
-            with patch('os.path.basename', return_value='monitoring'):
-                menu = app._create_menu()
-                # メニューアイテムが作成されることを確認
-                assert mock_pystray.MenuItem.called
+        mocker.patch('os.path.basename', return_value='monitoring')
+        menu = app._create_menu()
+        # メニューアイテムが作成されることを確認
+        assert mock_pystray.MenuItem.called
 
 
 class TestTrayAppWatching:
     """ファイル監視のテスト"""
 
-    def test_start_watching_creates_observer(self, mock_config, mock_observer, caplog):
+    def test_start_watching_creates_observer(self, mocker, mock_config, src_dir_exists, mock_observer, caplog):
         """ファイル監視が正しく開始される"""
-        with patch('os.path.exists', return_value=True):
-            with patch('app.tray_app.FileUploadHandler') as mock_handler:
-                mock_handler_instance = MagicMock()
-                mock_handler.return_value = mock_handler_instance
-                app = TrayApp()
-
-                with caplog.at_level(logging.INFO):
-                    app.start_watching()
-
-                mock_observer.assert_called_once()
-                observer_instance = mock_observer.return_value
-                observer_instance.schedule.assert_called_once()
-                observer_instance.start.assert_called_once()
-                mock_handler_instance.scan_existing_files.assert_called_once_with(r'C:\test\src')
-                assert "フォルダ監視を開始しました" in caplog.text
-
-    def test_stop_watching_stops_observer(self, mock_config, caplog):
+        mock_handler = mocker.patch('app.tray_app.FileUploadHandler')
+        mock_handler_instance = MagicMock()
+        mock_handler.return_value = mock_handler_instance
+        app = TrayApp()
+
+        with caplog.at_level(logging.INFO):
+            app.start_watching()
+
+        mock_observer.assert_called_once()
+        observer_instance = mock_observer.return_value
+        observer_instance.schedule.assert_called_once_with(
+            mock_handler_instance,
+            r'C:\test\src',
+            recursive=False,
+            event_filter=[FileCreatedEvent, FileMovedEvent]
+        )
+        observer_instance.start.assert_called_once()
+        mock_handler_instance.scan_existing_files.assert_called_once_with(r'C:\test\src')
+        mock_handler_instance.uploader.warm_up.assert_called_once()
+        assert "フォルダ監視を開始しました" in caplog.text
+
+    def test_stop_watching_stops_observer(self, app, caplog):
         """ファイル監視が正しく停止される"""
-        with patch('os.path.exists', return_value=True):
-            app = TrayApp()
-            app.observer = MagicMock(spec=Observer)
+        app.observer = MagicMock(spec=Observer)
+
+        with caplog.at_level(logging.INFO):
+            app.stop_watching()
 
-            with caplog.at_level(logging.INFO):
-                app.stop_watching()
+        app.observer.stop.assert_called_once()
+        app.observer.join.assert_called_once()
+        assert "フォルダ監視を停止しました" in caplog.text
 
-            app.observer.stop.assert_called_once()
-            app.observer.join.assert_called_once()
-            assert "フォルダ監視を停止しました" in caplog.text
+    def test_stop_watching_joins_with_timeout(self, app, caplog):
+        """監視スレッドの終了待ちは上限時間で打ち切る"""
+        app.observer = MagicMock(spec=Observer)
+        app.observer.is_alive.return_value = True
 
-    def test_stop_watching_without_observer(self, mock_config):
-        """observerがNoneの場合でも正常終了"""
-        with patch('os.path.exists', return_value=True):
-            app = TrayApp()
-            app.observer = None
-            # 例外が発生しないことを確認
+        with caplog.at_level(logging.WARNING):
             app.stop_watching()
 
+        app.observer.join.assert_called_once_with(timeout=1.0)
+        assert "終了を待たずに停止します" in caplog.text
+
+    def test_stop_watching_closes_event_handler(self, app):
+        """監視停止時にアップローダーのブラウザも終了する"""
+        app.observer = MagicMock(spec=Observer)
+        app.event_handler = MagicMock()
+
+        app.stop_watching()
+
+        app.event_handler.close.assert_called_once()
+
+    def test_stop_watching_without_observer(self, app):
+        """observerがNoneの場合でも正常終了"""
+        app.observer = None
+        # 例外が発生しないことを確認
+        app.stop_watching()
+
 
 class TestTrayAppRun:
     """アプリケーション実行のテスト"""
 
-    def test_run_starts_thread_and_icon(self, mock_config, mock_pystray):
-        """runメソッドがスレッドとアイコンを起動"""
-        with patch('os.path.exists', return_value=True):
-            with patch('app.tray_app.threading.Thread') as mock_thread:
-                mock_thread_instance = MagicMock()
-                mock_thread.return_value = mock_thread_instance
-                mock_icon_instance = MagicMock()
-                mock_pystray.Icon.return_value = mock_icon_instance
-
-                app = TrayApp()
-                app.run()
-
-                # スレッドが作成され、daemon=Trueで開始されることを確認
-                mock_thread.assert_called_once()
-                call_kwargs = mock_thread.call_args[1]
-                assert call_kwargs['daemon'] is True
-                mock_thread_instance.start.assert_called_once()
-
-                # アイコンが作成され実行されることを確認
-                mock_pystray.Icon.assert_called_once()
-                mock_icon_instance.run.assert_called_once()
-
-    def test_run_creates_icon_with_correct_params(self, mock_config, mock_pystray):
+    def test_run_starts_watching_and_icon(self, mocker, mock_config, src_dir_exists, mock_pystray):
+        """runメソッドが監視を開始してからアイコンを起動"""
+        mock_icon_instance = MagicMock()
+        mock_pystray.Icon.return_value = mock_icon_instance
+
+        app = TrayApp()
+        calls = []
+        mocker.patch.object(app, 'start_watching', side_effect=lambda: calls.append('start_watching'))
+        mock_icon_instance.run.side_effect = lambda: calls.append('icon.run')
+        app.run()
+
+        # 監視用のスレッドは作らず、アイコンの実行前に監視を開始する
+        assert calls == ['start_watching', 'icon.run']
+        mock_pystray.Icon.assert_called_once()
+
+    def test_run_creates_icon_with_correct_params(self, mocker, mock_config, src_dir_exists, mock_pystray):
         """アイコンが正しいパラメータで作成される"""
-        with patch('os.path.exists', return_value=True):
-            with patch('app.tray_app.threading.Thread') as mock_thread:
-                mock_icon_instance = MagicMock()
-                mock_pystray.Icon.return_value = mock_icon_instance
+        mock_icon_instance = MagicMock()
+        mock_pystray.Icon.return_value = mock_icon_instance
 
-                app = TrayApp()
-                app.run()
+        app = TrayApp()
+        mocker.patch.object(app, 'start_watching')
+        app.run()
 
-                # Icon呼び出しの引数を確認
-                call_kwargs = mock_pystray.Icon.call_args[1]
-                assert call_kwargs['name'] == 'MEGATransfer'
-                assert call_kwargs['title'] == 'MEGATransfer'
-                assert 'icon' in call_kwargs
-                assert 'menu' in call_kwargs
+        # Icon呼び出しの引数を確認
+        call_kwargs = mock_pystray.Icon.call_args[1]
+        assert call_kwargs['name'] == 'MEGATransfer'
+        assert call_kwargs['title'] == 'MEGATransfer'
+        assert 'icon' in call_kwargs
+        assert 'menu' in call_kwargs
 
 
 class TestTrayAppEdgeCases:
     """エッジケースのテスト"""
 
-    def test_open_folder_with_unicode_path(self, mock_config, mock_subprocess):
+    def test_open_folder_with_unicode_path(self, mock_config, src_dir_exists, mock_startfile):
         """Unicode文字を含むパスでフォルダを開く"""
-        with patch('os.path.exists', return_value=True):
-            mock_config.return_value = r'C:\test\日本語フォルダ'
-            app = TrayApp()
-            app.src_dir = r'C:\test\日本語フォルダ'
+        mock_config.return_value = r'C:\test\日本語フォルダ'
+        app = TrayApp()
+        app.src_dir = r'C:\test\日本語フォルダ'
 
-            app._open_folder()
-            mock_subprocess.Popen.assert_called_once_with(['explorer', r'C:\test\日本語フォルダ'])
+        app._open_folder()
+        mock_startfile.assert_called_once_with(r'C:\test\日本語フォルダ')
 
-    def test_quit_app_without_observer_and_icon(self, mock_config):
+    def test_quit_app_without_observer_and_icon(self, app):
         """observerもiconもNoneの場合でも正常終了"""
-        with patch('os.path.exists', return_value=True):
-            app = TrayApp()
-            app.observer = None
-            app.icon = None
+        app.observer = None
+        app.icon = None
 
-            # 例外が発生しないことを確認
-            app._quit_app()
+        # 例外が発生しないことを確認
+        app._quit_app()
 
-    def test_stop_watching_called_multiple_times(self, mock_config):
+    def test_stop_watching_called_multiple_times(self, app):
         """stop_watchingを複数回呼び出しても問題ない"""
-        with patch('os.path.exists', return_value=True):
-            app = TrayApp()
-            app.observer = MagicMock(spec=Observer)
+        app.observer = MagicMock(spec=Observer)
 
-            app.stop_watching()
-            # observerは停止後にNoneにならないため、2回目は同じobserverに対して呼ばれる
-            # 実装上は問題ないことを確認
-            app.stop_watching()
+        app.stop_watching()
+        # observerは停止後にNoneにならないため、2回目は同じobserverに対して呼ばれる
+        # 実装上は問題ないことを確認
+        app.stop_watching()
 
-    def test_create_icon_image_properties(self, mock_config):
+    def test_create_icon_image_properties(self, readonly_app):
         """アイコン画像の詳細なプロパティを確認"""
-        with patch('os.path.exists', return_value=True):
-            app = TrayApp()
-            image = app._create_icon_image()
+        image = readonly_app._create_icon_image()
 
-            # 画像の基本プロパティ
-            assert image.size == (64, 64)
-            assert image.mode == 'RGBA'
-            # 画像が完全に透明でないことを確認（何かが描画されている）
-            assert image.getbbox() is not None
+        # 画像の基本プロパティ
+        assert image.size == (64, 64)
+        assert image.mode == 'RGBA'
+        # 画像が完全に透明でないことを確認（何かが描画されている）
+        assert image.getbbox() is not None
 
-    def test_validate_src_dir_with_network_path(self, mock_config):
+    def test_validate_src_dir_with_network_path(self, mocker, mock_config):
         """ネットワークパスが存在しない場合"""
-        with patch('os.path.exists', return_value=False):
-            mock_config.return_value = r'\\network\share\folder'
-            with pytest.raises(SystemExit) as excinfo:
-                TrayApp()
-            assert excinfo.value.code == 1
-
-    def test_start_watching_with_already_started_observer(self, mock_config, mock_observer):
-        """既にobserverが存在する場合の処理"""
-        with patch('os.path.exists', return_value=True):
-            with patch('app.tray_app.FileUploadHandler') as mock_handler:
-                mock_handler_instance = MagicMock()
-                mock_handler.return_value = mock_handler_instance
-                app = TrayApp()
-                app.observer = MagicMock(spec=Observer)
-                old_observer = app.observer
-
-                # start_watchingを再度呼び出すと新しいobserverが作成される
-                app.start_watching()
-
-                # 古いobserverは置き換えられる
-                assert app.observer != old_observer
-
-    def test_menu_callback_functions(self, mock_config, mock_subprocess):
+        mocker.patch('os.path.isdir', return_value=False)
+        mock_config.return_value = r'\\network\share\folder'
+        with pytest.raises(SystemExit) as excinfo:
+            TrayApp()
+        assert excinfo.value.code == 1
+
+    def test_start_watching_reuses_running_observer(self, mocker, mock_config, src_dir_exists, mock_observer):
+        """動作中のobserverがある場合は作り直さず監視の登録だけを差し替える"""
+        mock_handler = mocker.patch('app.tray_app.FileUploadHandler')
+        app = TrayApp()
+        running_observer = MagicMock(spec=Observer)
+        running_observer.is_alive.return_value = True
+        app.observer = running_observer
+
+        app.start_watching()
+
+        mock_observer.assert_not_called()
+        assert app.observer is running_observer
+        running_observer.unschedule_all.assert_called_once()
+        running_observer.schedule.assert_called_once_with(
+            mock_handler.return_value,
+            r'C:\test\src',
+            recursive=False,
+            event_filter=[FileCreatedEvent, FileMovedEvent]
+        )
+        running_observer.start.assert_not_called()
+
+    def test_start_watching_closes_previous_handler(self, mocker, mock_config, src_dir_exists, mock_observer):
+        """再開時は前のハンドラーを閉じてから新しいハンドラーを作成する"""
+        mock_handler = mocker.patch('app.tray_app.FileUploadHandler')
+        app = TrayApp()
+        running_observer = MagicMock(spec=Observer)
+        running_observer.is_alive.return_value = True
+        app.observer = running_observer
+        previous_handler = MagicMock()
+        app.event_handler = previous_handler
+        calls = []
+        running_observer.unschedule_all.side_effect = lambda: calls.append('unschedule_all')
+        previous_handler.close.side_effect = lambda: calls.append('close')
+        mock_handler.side_effect = lambda: calls.append('new_handler') or MagicMock()
+
+        app.start_watching()
+
+        # 前のハンドラーへの通知を止めてから閉じ、その後に新しいハンドラーを作成する
+        assert calls == ['unschedule_all', 'close', 'new_handler']
+        assert app.event_handler is not previous_handler
+
+    def test_start_watching_replaces_stopped_observer(self, mocker, mock_config, src_dir_exists, mock_observer):
+        """停止済みのobserverは再開できないため新しく作成する"""
+        mocker.patch('app.tray_app.FileUploadHandler')
+        app = TrayApp()
+        stopped_observer = MagicMock(spec=Observer)
+        stopped_observer.is_alive.return_value = False
+        app.observer = stopped_observer
+
+        app.start_watching()
+
+        assert app.observer is mock_observer.return_value
+        mock_observer.return_value.start.assert_called_once()
+
+    def test_menu_callback_functions(self, app, mock_startfile):
         """メニューのコールバック関数が正しく動作"""
-        with patch('os.path.exists', return_value=True):
-            app = TrayApp()
-            app.observer = MagicMock(spec=Observer)
-            app.icon = MagicMock()
+        app.observer = MagicMock(spec=Observer)
+        app.icon = MagicMock()
 
-            # フォルダを開くコールバック
-            app._open_folder()
-            mock_subprocess.Popen.assert_called_once()
+        # フォルダを開くコールバック
+        app._open_folder()
+        mock_startfile.assert_called_once()
 
-            # 終了コールバック
-            app._quit_app()
-            app.observer.stop.assert_called_once()
-            app.icon.stop.assert_called_once()
+        # 終了コールバック
+        app._quit_app()
+        app.observer.stop.assert_called_once()
+        app.icon.stop.assert_called_once()
@@ -1,9 +1,13 @@
 import configparser
+import functools
+import logging
 import os
 import re
 import sys
 from typing import Any
 
+logger = logging.getLogger(__name__)
+
 
 def get_config_path():
     if getattr(sys, 'frozen', False):
@@ -18,13 +22,16 @@ def get_config_path():
 
 CONFIG_PATH = get_config_path()
 
+# ConfigParser.getbooleanと同じく真とみなす文字列
+TRUE_VALUES = frozenset({'true', '1', 'yes', 'on'})
+
 
 def get_config_value(config: configparser.ConfigParser, section: str, key: str, default: Any) -> Any:
     try:
         value = config[section][key]
         # bool型の場合は文字列を正しくパース
         if isinstance(default, bool):
-            return value.lower() in ('true', '1', 'yes', 'on')
+            return value.lower() in TRUE_VALUES
         return type(default)(value)
     except (KeyError, ValueError, TypeError):
         return default
@@ -33,41 +40,68 @@ def get_config_value(config: configparser.ConfigParser, section: str, key: str,
 def load_config() -> configparser.ConfigParser:
     config = configparser.ConfigParser()
     try:
+        # ファイル全体を1回で読み込んでデコードし、行単位の読み出しをメモリ上で行う
         with open(CONFIG_PATH, encoding='utf-8') as f:
-            config.read_file(f)
+            config.read_string(f.read(), source=CONFIG_PATH)
     except FileNotFoundError:
-        print(f"設定ファイルが見つかりません: {CONFIG_PATH}")
+        logger.error("設定ファイルが見つかりません: %s", CONFIG_PATH)
         raise
     except configparser.Error as e:
-        print(f"設定ファイルの解析中にエラーが発生しました: {e}")
+        logger.error("設定ファイルの解析中にエラーが発生しました: %s", e)
         raise
     return config
 
 
+_cached_functions = []
+
+
+def _cache_until_invalidated(func):
+    """結果をinvalidate_configが呼ばれるまで使い回す"""
+    cached = functools.cache(func)
+    _cached_functions.append(cached)
+    return cached
+
+
+@_cache_until_invalidated
+def _load_shared_config() -> configparser.ConfigParser:
+    """読み取り専用で共有する設定を1回だけ読み込む"""
+    return load_config()
+
+
+def invalidate_config():
+    """共有している設定と変換済みの値を破棄し、次回の取得時に読み込み直す"""
+    for cached in _cached_functions:
+        cached.cache_clear()
+
+
 def save_config(config: configparser.ConfigParser):
     try:
         with open(CONFIG_PATH, 'w', encoding='utf-8') as configfile:
             config.write(configfile)
     except IOError as e:
-        print(f"設定ファイルの保存中にエラーが発生しました: {e}")
+        logger.error("設定ファイルの保存中にエラーが発生しました: %s", e)
         raise
+    invalidate_config()
 
 
+@_cache_until_invalidated
 def get_src_dir() -> str:
     """監視対象のディレクトリパスを取得"""
-    config = load_config()
+    config = _load_shared_config()
     return config.get('Paths', 'src_dir')
 
 
+@_cache_until_invalidated
 def get_mega_url() -> str:
     """MEGAファイルリクエストのURLを取得"""
-    config = load_config()
+    config = _load_shared_config()
     return config.get('URL', 'MEGAfilerequest')
 
 
+@_cache_until_invalidated
 def get_rename_pattern() -> re.Pattern:
     """ファイル名変換用の正規表現パターンを取得"""
-    config = load_config()
+    config = _load_shared_config()
     # config.iniの [filename] セクションを優先的に読み込む
     pattern_str = config.get('filename', 'pattern', fallback='')
 
@@ -81,48 +115,54 @@ def get_rename_pattern() -> re.Pattern:
     try:
         return re.compile(pattern_str)
     except re.error as e:
-        print(f"正規表現パターンが無効です: {pattern_str}")
-        print(f"エラー: {e}")
+        logger.error("正規表現パターンが無効です: %s: %s", pattern_str, e)
         raise
 
 
+@_cache_until_invalidated
 def get_wait_time() -> float:
-    """ファイル書き込み完了を待つ時間を取得（秒）"""
-    config = load_config()
+    """ファイル書き込み完了を待つ最大時間を取得（秒）"""
+    config = _load_shared_config()
     return config.getfloat('App', 'wait_time', fallback=0.5)
 
 
+@_cache_until_invalidated
 def get_batch_delay() -> float:
     """バッチ処理の待機時間を取得（秒）"""
-    config = load_config()
+    config = _load_shared_config()
     return config.getfloat('App', 'batch_delay', fallback=3.0)
 
 
+@_cache_until_invalidated
 def get_upload_complete_text() -> str:
     """アップロード完了を示すテキストを取得"""
-    config = load_config()
+    config = _load_shared_config()
     return config.get('Uploader', 'upload_complete_text', fallback='アップロード済み')
 
 
+@_cache_until_invalidated
 def get_max_wait_time() -> float:
     """完了チェックの最大待機時間を取得（秒）"""
-    config = load_config()
+    config = _load_shared_config()
     return config.getfloat('Uploader', 'max_wait_time', fallback=300)
 
 
-def get_check_interval() -> float:
-    """完了チェックの間隔を取得（秒）"""
-    config = load_config()
-    return config.getfloat('Uploader', 'check_interval', fallback=0.5)
-
-
+@_cache_until_invalidated
 def get_headless() -> bool:
     """ヘッドレスモードで実行するかどうかを取得"""
-    config = load_config()
+    config = _load_shared_config()
     return config.getboolean('Uploader', 'headless', fallback=True)
 
 
+@_cache_until_invalidated
 def get_post_upload_wait() -> float:
     """アップロード完了後の待機時間を取得（秒）"""
-    config = load_config()
+    config = _load_shared_config()
     return config.getfloat('Uploader', 'post_upload_wait', fallback=3.0)
+
+
+@_cache_until_invalidated
+def get_parallel_uploads() -> int:
+    """1件ずつアップロードする際に並行して使うページ数を取得"""
+    config = _load_shared_config()
+    return max(1, config.getint('Uploader', 'parallel_uploads', fallback=3))
@@ -44,7 +44,7 @@ def setup_logging(config=None):
             root_logger.setLevel(level)
         except AttributeError:
             root_logger.setLevel(logging.INFO)
-            logging.warning(f"無効なログレベル '{log_level}' が指定されました。INFOを使用します。")
+            logging.warning("無効なログレベル '%s' が指定されました。INFOを使用します。", log_level)
 
         root_logger.addHandler(file_handler)
 
@@ -55,7 +55,7 @@ def setup_logging(config=None):
 
         cleanup_old_logs(log_directory, log_retention_days, project_name)
 
-        logging.info(f"ログシステムが初期化されました: {log_file}")
+        logging.info("ログシステムが初期化されました: %s", log_file)
 
     except PermissionError as e:
         raise PermissionError(f"ログディレクトリの作成権限がありません: {e}")
@@ -79,16 +79,16 @@ def cleanup_old_logs(log_directory: str, retention_days: int, project_name: str)
                         file_modification_time = datetime.fromtimestamp(os.path.getmtime(file_path))
                         if now - file_modification_time >= timedelta(days=retention_days):
                             os.remove(file_path)
-                            logging.info(f"古いログファイルを削除しました: {filename}")
+                            logging.info("古いログファイルを削除しました: %s", filename)
                             deleted_count += 1
                     except OSError as e:
-                        logging.error(f"ログファイルの削除中にエラーが発生しました {filename}: {str(e)}")
+                        logging.error("ログファイルの削除中にエラーが発生しました %s: %s", filename, e)
 
         if deleted_count > 0:
-            logging.info(f"合計 {deleted_count} 個の古いログファイルを削除しました")
+            logging.info("合計 %s 個の古いログファイルを削除しました", deleted_count)
 
     except Exception as e:
-        logging.error(f"ログクリーンアップ処理中にエラーが発生しました: {str(e)}")
+        logging.error("ログクリーンアップ処理中にエラーが発生しました: %s", e)
 
 
 def setup_debug_logging(config=None):
@@ -119,11 +119,11 @@ def setup_debug_logging(config=None):
         debug_logger.addHandler(debug_handler)
         debug_logger.propagate = False
 
-        logging.info(f"デバッグログが有効化されました: {debug_log_path}")
+        logging.info("デバッグログが有効化されました: %s", debug_log_path)
         return debug_logger
 
     except Exception as e:
-        logging.error(f"デバッグログ設定中にエラーが発生しました: {str(e)}")
+        logging.error("デバッグログ設定中にエラーが発生しました: %s", e)
         return None
 
 
@@ -151,5 +151,5 @@ def get_log_info(config=None):
         }
 
     except Exception as e:
-        logging.error(f"ログ情報取得中にエラーが発生しました: {str(e)}")
+        logging.error("ログ情報取得中にエラーが発生しました: %s", e)
         return None